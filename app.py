@@ -1,8 +1,19 @@
+import logging
+
 import streamlit as st
 
 # Import configuration and validate settings
 from config.settings import settings
 
+# An unknown LOG_LEVEL falls back to WARNING rather than failing at import
+log_level = logging.getLevelName(settings.LOG_LEVEL)
+logging.basicConfig(
+    level=log_level if isinstance(log_level, int) else logging.WARNING,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+if not isinstance(log_level, int):
+    logging.getLogger(__name__).warning("Unknown LOG_LEVEL %r, using WARNING", settings.LOG_LEVEL)
+
 # Validate API keys before anything else
 try:
     settings.validate()
@@ -13,14 +24,12 @@ except ValueError as e:
 # Import UI components
 from ui.components import (
     init_session_state,
-    display_chat_history,
-    add_message,
     display_sidebar_info,
     display_file_uploader,
     display_processing_status,
     create_web_search_toggle
 )
-from ui.chat_interface import ChatInterface
+from ui.chat_interface import chat_section, get_chat_interface
 
 
 # Page configuration
@@ -55,11 +64,8 @@ def main():
     # Initialize session state
     init_session_state()
     
-    # Initialize chat interface (cached in session state)
-    if "chat_interface" not in st.session_state:
-        st.session_state.chat_interface = ChatInterface()
-    
-    chat = st.session_state.chat_interface
+    # Per-session chat interface (its heavy components are shared process-wide)
+    chat = get_chat_interface()
     
     
     # Display sidebar
@@ -93,9 +99,6 @@ def main():
     
     st.divider()
     
-    # Display chat history
-    display_chat_history()
-    
     # Chat input
     st.markdown("""
     <style>
@@ -105,39 +108,9 @@ def main():
     }
     </style>
     """, unsafe_allow_html=True)
-
-    if prompt := st.chat_input("Ask a question about your documents..."):
-        add_message("user", prompt)
-
-        
-        # Display user message
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        
-        # Generate and display assistant response
-        with st.chat_message("assistant"):
-            try:
-                # Stream the response
-                response = st.write_stream(
-                    chat.get_response(prompt, use_web_search=use_web_search)
-                )
-                
-                # Get sources
-                sources = chat.get_sources(prompt, use_web_search=use_web_search)
-                
-                # Show sources if available
-                if sources:
-                    with st.expander("📚 Sources"):
-                        for source in sources:
-                            st.write(f"- {source}")
-                
-                # Add assistant message to history
-                add_message("assistant", response, sources)
-                
-            except Exception as e:
-                error_msg = f"❌ Error generating response: {str(e)}"
-                st.error(error_msg)
-                add_message("assistant", error_msg)
+    
+    # Chat history, input and response rerun on their own
+    chat_section(chat, use_web_search=use_web_search)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from dotenv import load_dotenv
 from typing import Optional
@@ -8,7 +8,15 @@ from typing import Optional
 load_dotenv()
 
 
-@dataclass
+def _env(name: str, default=None, cast=None):
+    """Dataclass field whose value is read (and cast) from the environment once per instance."""
+    def factory():
+        value = os.getenv(name, default)
+        return cast(value) if cast is not None and value is not None else value
+    return field(default_factory=factory)
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     """
     Centralized configuration settings for the RAG application.
@@ -20,16 +28,30 @@ class Settings:
     - Local: .env file or .streamlit/secrets.toml
     - Streamlit Cloud: Dashboard secrets
     - Docker/Other: Environment variables
+    
+    Values are parsed once when the instance is created and are read-only.
     """
-    GROQ_API_KEY:str = os.getenv("GROQ_API_KEY")
-    TAVILY_API_KEY:str = os.getenv("TAVILY_API_KEY")
-    LLM_MODEL:str = os.getenv("LLM_MODEL")
-    LLM_TEMPERATURE:float =  float(os.getenv("LLM_TEMPERATURE", 0))
-    EMBEDDING_MODEL:str = os.getenv("EMBEDDING_MODEL")
-    CHUNK_SIZE:int = int(os.getenv("CHUNK_SIZE", 1000))
-    CHUNK_OVERLAP:int = int(os.getenv("CHUNK_OVERLAP", 200))
-    FAISS_INDEX_PATH:str = os.getenv("FAISS_INDEX_PATH")
-    TOP_K_RESULTS:int = int(os.getenv("TOP_K_RESULTS", 3))
+    GROQ_API_KEY:str = _env("GROQ_API_KEY")
+    TAVILY_API_KEY:str = _env("TAVILY_API_KEY")
+    LLM_MODEL:str = _env("LLM_MODEL")
+    LLM_TEMPERATURE:float = _env("LLM_TEMPERATURE", 0, float)
+    EMBEDDING_MODEL:str = _env("EMBEDDING_MODEL")
+    EMBEDDING_BACKEND:str = _env("EMBEDDING_BACKEND", "torch", str.lower)  # torch | onnx
+    ONNX_MODEL_DIR:str = _env("ONNX_MODEL_DIR", "data/onnx_models")
+    EMBEDDING_BATCH_SIZE:int = _env("EMBEDDING_BATCH_SIZE", 64, int)
+    EMBEDDING_CACHE_PATH:str = _env("EMBEDDING_CACHE_PATH", "data/embedding_cache.db")
+    CHUNK_SIZE:int = _env("CHUNK_SIZE", 1000, int)
+    CHUNK_OVERLAP:int = _env("CHUNK_OVERLAP", 200, int)
+    FAISS_INDEX_PATH:str = _env("FAISS_INDEX_PATH")
+    INDEX_TYPE:str = _env("INDEX_TYPE", "flat", str.lower)  # flat | hnsw | sq8 | ivf
+    IVF_NPROBE:int = _env("IVF_NPROBE", 10, int)
+    TOP_K_RESULTS:int = _env("TOP_K_RESULTS", 3, int)
+    TAVILY_CACHE_TTL:int = _env("TAVILY_CACHE_TTL", 300, int)
+    STREAM_OPTIMIZATION_MODE:str = _env("STREAM_OPTIMIZATION_MODE", "balanced", str.lower)  # off | balanced | strong
+    MAX_CHAT_HISTORY:int = _env("MAX_CHAT_HISTORY", 50, int)
+    SEMANTIC_CACHE_THRESHOLD:float = _env("SEMANTIC_CACHE_THRESHOLD", 0.95, float)
+    SEMANTIC_CACHE_SIZE:int = _env("SEMANTIC_CACHE_SIZE", 256, int)  # 0 disables
+    LOG_LEVEL:str = _env("LOG_LEVEL", "WARNING", str.upper)
 
 
     def validate(self) -> bool:
@@ -1,5 +1,5 @@
-from core.document_processor import DocumentProcessor
-from core.embeddings import EmbeddingManager
+from core.document_processor import DocumentProcessor, get_processor
+from core.embeddings import EmbeddingManager, get_embedding_model
 from core.vector_store import VectorStoreManager
-from core.chain import RAGChain
-__all__ = ["DocumentProcessor", "EmbeddingManager", "VectorStoreManager", "RAGChain"]
\ No newline at end of file
+from core.chain import RAGChain, get_llm, unique_sources
+__all__ = ["DocumentProcessor", "EmbeddingManager", "VectorStoreManager", "RAGChain", "get_processor", "get_embedding_model", "get_llm", "unique_sources"]
\ No newline at end of file
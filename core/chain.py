@@ -1,11 +1,16 @@
-from typing import List, Optional, Generator
+import asyncio
+import functools
+from typing import AsyncGenerator, List, Optional, Generator, Tuple
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
 
 from config.settings import settings
+from core.http_client import get_async_http_client, get_http_client
 from core.vector_store import VectorStoreManager
+from core.semantic_cache import SemanticCache
+from core.streaming import abuffer_chunks, buffer_chunks, iterate_async
 
 
 # RAG Prompt Template
@@ -20,6 +25,50 @@ Question: {question}
 Answer: """
 
 
+def _legacy_source_type(source: str) -> str:
+    """Derive the source type for documents indexed before it was stored in metadata."""
+    source = source.lower()
+    return "pdf" if source.endswith(".pdf") else "txt" if source.endswith(".txt") else "wikipedia"
+
+
+def unique_sources(documents: List[Document]) -> List[str]:
+    """
+    Source names of documents, deduplicated in retrieval order.
+    
+    Args:
+        documents: Retrieved documents, most relevant first
+        
+    Returns:
+        List of unique source names
+    """
+    return list(dict.fromkeys(doc.metadata.get("source", "Unknown") for doc in documents))
+
+
+@functools.lru_cache(maxsize=4)
+def get_llm(model_name: str, temperature: float) -> ChatGroq:
+    """
+    Create a Groq chat client once per (model, temperature).
+    
+    The client is shared across chains and Streamlit sessions, and its
+    requests go through the shared HTTP/2 clients from core.http_client,
+    so connections are reused instead of rebuilt per session.
+    
+    Args:
+        model_name: Groq model name
+        temperature: LLM temperature
+        
+    Returns:
+        ChatGroq instance
+    """
+    return ChatGroq(
+        model=model_name,
+        temperature=temperature,
+        api_key=settings.GROQ_API_KEY,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client()
+    )
+
+
 class RAGChain:
     """
     Orchestrates the RAG (Retrieval-Augmented Generation) pipeline.
@@ -28,6 +77,7 @@ class RAGChain:
     - Groq for LLM inference (FREE!)
     - FAISS for vector retrieval
     - Custom prompts for response generation
+    - A semantic cache so paraphrased repeat questions skip retrieval + LLM
     """
     
     def __init__(
@@ -48,24 +98,50 @@ class RAGChain:
         self.model_name = model_name or settings.LLM_MODEL
         self.temperature = temperature if temperature is not None else settings.LLM_TEMPERATURE
         
-        # Initialize Groq LLM
-        self._llm = ChatGroq(
-            model=self.model_name,
-            temperature=self.temperature,
-            api_key=settings.GROQ_API_KEY
-        )
+        # Shared Groq LLM client
+        self._llm = get_llm(self.model_name, self.temperature)
         
         # Initialize prompt template
         self._prompt = ChatPromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
         
         # Output parser
         self._output_parser = StrOutputParser()
+        
+        # Compose the chain once: prompt -> llm -> parser
+        self._chain = self._prompt | self._llm | self._output_parser
+        
+        # Query-embedding -> answer cache
+        self._semantic_cache = SemanticCache()
+        
+        # Sources behind the most recent streamed answer
+        self.last_sources: List[str] = []
     
     @property
     def llm(self) -> ChatGroq:
         """Get the LLM instance."""
         return self._llm
     
+    def clear_cache(self) -> None:
+        """Forget cached answers (call after the indexed documents change)."""
+        self._semantic_cache.clear()
+    
+    def _cache_lookup(self, question: str, k: Optional[int]) -> Tuple[List[float], Optional[dict]]:
+        """
+        Embed the question and look it up in the semantic cache.
+        
+        Args:
+            question: User's question
+            k: Number of documents requested
+            
+        Returns:
+            Tuple of (query embedding, cached result dict or None)
+        """
+        query_vec = self.vector_store.embedding_manager.embed_query(question)
+        cached = self._semantic_cache.lookup(query_vec)
+        if cached is not None and cached.value["k"] == k:
+            return query_vec, dict(cached.value["result"])
+        return query_vec, None
+    
     def _format_context(self, documents: List[Document]) -> str:
         """
         Format retrieved documents into a context string.
@@ -81,20 +157,22 @@ class RAGChain:
         
         context_parts = []
         for i, doc in enumerate(documents, 1):
-            source = doc.metadata.get("source", "Unknown")
-            title = doc.metadata.get("title", "unknown")
-            source_type = "pdf" if source.lower().endswith(".pdf") else "txt" if source.lower().endswith(".txt") else "wkipedia"
+            metadata = doc.metadata
+            source = metadata.get("source", "Unknown")
+            title = metadata.get("title", "unknown")
+            source_type = metadata.get("source_type") or _legacy_source_type(source)
             context_parts.append(f"[Document {i}] (Title: {title}), (Source: {source}), (Type: {source_type}) \n{doc.page_content}")
         
         return "\n\n".join(context_parts)
     
-    def retrieve(self, query: str, k: int = None) -> List[Document]:
+    def retrieve(self, query: str, k: int = None, query_vec: List[float] = None) -> List[Document]:
         """
         Retrieve relevant documents for a query.
         
         Args:
             query: User's question
             k: Number of documents to retrieve
+            query_vec: Precomputed query embedding (skips re-embedding)
             
         Returns:
             List of relevant documents
@@ -102,8 +180,29 @@ class RAGChain:
         if not self.vector_store.is_initialized:
             return []
         
+        if query_vec is not None:
+            return self.vector_store.search_by_vector(query_vec, k=k)
         return self.vector_store.search(query, k=k)
     
+    async def aretrieve(self, query: str, k: int = None, query_vec: List[float] = None) -> List[Document]:
+        """
+        Async version of retrieve.
+        
+        Args:
+            query: User's question
+            k: Number of documents to retrieve
+            query_vec: Precomputed query embedding (skips re-embedding)
+            
+        Returns:
+            List of relevant documents
+        """
+        if not self.vector_store.is_initialized:
+            return []
+        
+        if query_vec is not None:
+            return await self.vector_store.asearch_by_vector(query_vec, k=k)
+        return await self.vector_store.asearch(query, k=k)
+    
     def generate(self, query: str, context: str) -> str:
         """
         Generate a response given query and context.
@@ -115,11 +214,8 @@ class RAGChain:
         Returns:
             Generated response
         """
-        # Create the chain: prompt -> llm -> parser
-        chain = self._prompt | self._llm | self._output_parser
-        
         # Invoke the chain
-        response = chain.invoke({
+        response = self._chain.invoke({
             "context": context,
             "question": query
         })
@@ -135,16 +231,29 @@ class RAGChain:
             context: Retrieved context string
             
         Yields:
-            Response chunks as they're generated
+            Response chunks, coalesced into word-sized pieces
         """
-        # Create the chain
-        chain = self._prompt | self._llm | self._output_parser
-        
         # Stream the response
-        for chunk in chain.stream({
+        yield from buffer_chunks(self._chain.stream({
             "context": context,
             "question": query
-        }):
+        }))
+    
+    async def agenerate_stream(self, query: str, context: str) -> AsyncGenerator[str, None]:
+        """
+        Generate a streaming response without blocking on network reads.
+        
+        Args:
+            query: User's question
+            context: Retrieved context string
+            
+        Yields:
+            Response chunks, coalesced into word-sized pieces
+        """
+        async for chunk in abuffer_chunks(self._chain.astream({
+            "context": context,
+            "question": query
+        })):
             yield chunk
     
     def query(self, question: str, k: int = None) -> dict:
@@ -158,8 +267,13 @@ class RAGChain:
         Returns:
             Dictionary with 'answer', 'sources', and 'context'
         """
-        # Step 1: Retrieve relevant documents
-        documents = self.retrieve(question, k=k)
+        # Step 0: Reuse the answer to a near-identical earlier question
+        query_vec, cached = self._cache_lookup(question, k)
+        if cached is not None:
+            return cached
+        
+        # Step 1: Retrieve relevant documents (reusing the query embedding)
+        documents = self.retrieve(question, k=k, query_vec=query_vec)
         
         # Step 2: Format context
         context = self._format_context(documents)
@@ -167,21 +281,38 @@ class RAGChain:
         # Step 3: Generate response
         answer = self.generate(question, context)
         
-        # Extract sources
-        sources = [doc.metadata.get("source", "Unknown") for doc in documents]
-        
-        
-        return {
+        result = {
             "answer": answer,
-            "sources": list(set(sources)),  # Unique sources
+            "sources": unique_sources(documents),
             "context": context,
             "documents": documents
         }
+        self._semantic_cache.add(query_vec, {"k": k, "result": result})
+        return dict(result)
     
     def query_stream(self, question: str, k: int = None) -> Generator[str, None, None]:
         """
         Complete RAG pipeline with streaming response.
         
+        Synchronous wrapper around aquery_stream for callers such as
+        st.write_stream.
+        
+        Args:
+            question: User's question
+            k: Number of documents to retrieve
+            
+        Yields:
+            Response chunks as they're generated
+        """
+        yield from iterate_async(self.aquery_stream(question, k=k))
+    
+    async def aquery_stream(self, question: str, k: int = None) -> AsyncGenerator[str, None]:
+        """
+        Complete RAG pipeline with async streaming response.
+        
+        Embedding, retrieval and the Groq stream all run without holding
+        the event loop, so other sessions' requests can progress meanwhile.
+        
         Args:
             question: User's question
             k: Number of documents to retrieve
@@ -189,12 +320,30 @@ class RAGChain:
         Yields:
             Response chunks as they're generated
         """
-        # Step 1: Retrieve relevant documents
-        documents = self.retrieve(question, k=k)
+        # Step 0: Replay the answer to a near-identical earlier question
+        query_vec, cached = await asyncio.to_thread(self._cache_lookup, question, k)
+        if cached is not None:
+            self.last_sources = cached["sources"]
+            yield cached["answer"]
+            return
+        
+        # Step 1: Retrieve relevant documents (reusing the query embedding)
+        documents = await self.aretrieve(question, k=k, query_vec=query_vec)
+        self.last_sources = unique_sources(documents)
         
         # Step 2: Format context
         context = self._format_context(documents)
         
-        # Step 3: Stream response
-        for chunk in self.generate_stream(question, context):
-            yield chunk
\ No newline at end of file
+        # Step 3: Stream response, keeping a copy for the cache
+        answer_parts = []
+        async for chunk in self.agenerate_stream(question, context):
+            answer_parts.append(chunk)
+            yield chunk
+        
+        # Only cache fully streamed answers
+        self._semantic_cache.add(query_vec, {"k": k, "result": {
+            "answer": "".join(answer_parts),
+            "sources": self.last_sources,
+            "context": context,
+            "documents": documents
+        }})
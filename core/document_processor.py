@@ -1,10 +1,22 @@
+import functools
+import threading
 from typing import List
 from pathlib import Path
 from langchain_core.documents import Document
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from config.settings import settings
+from core.fast_splitter import split_text
+
+# PyMuPDF is C-backed and much faster than pypdf; fall back if unavailable
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+# PyMuPDF is not thread-safe, even across separate documents, and the
+# processor is shared between sessions: only one thread may use it at a time
+_FITZ_LOCK = threading.Lock()
 
 
 class DocumentProcessor:
@@ -28,17 +40,35 @@ class DocumentProcessor:
         """
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
-        
-        # Initialize the text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]  # Split hierarchy
-        )
     
 
 
+    def _load_pdf(self, file_path: str) -> List[Document]:
+        """
+        Load a PDF with one Document per page.
+        
+        Uses PyMuPDF directly when installed (one PDF at a time per
+        process), otherwise pypdf via PyPDFLoader.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            List of Document objects
+        """
+        if fitz is None:
+            return PyPDFLoader(file_path).load()
+        
+        with _FITZ_LOCK, fitz.open(file_path) as pdf:
+            total_pages = pdf.page_count
+            return [
+                Document(
+                    page_content=page.get_text("text"),
+                    metadata={"source": file_path, "page": i, "total_pages": total_pages}
+                )
+                for i, page in enumerate(pdf)
+            ]
+    
     def load_document(self, file_path: str) -> List[Document]:
         """
         Load a document from file path.
@@ -47,7 +77,7 @@ class DocumentProcessor:
             file_path: Path to the document file
             
         Returns:
-            List of Document objects
+            List of Document objects, tagged with metadata["source_type"]
             
         Raises:
             ValueError: If file type is not supported
@@ -56,13 +86,18 @@ class DocumentProcessor:
         extension = path.suffix.lower()
         
         if extension == ".txt":
-            loader = TextLoader(file_path, encoding="utf-8")
+            documents = TextLoader(file_path, encoding="utf-8").load()
         elif extension == ".pdf":
-            loader = PyPDFLoader(file_path)
+            documents = self._load_pdf(file_path)
         else:
             raise ValueError(f"Unsupported file type: {extension}. Use .txt or .pdf")
         
-        return loader.load()
+        # Tag once at ingest so retrieval doesn't re-derive it per query
+        source_type = extension.lstrip(".")
+        for doc in documents:
+            doc.metadata["source_type"] = source_type
+        
+        return documents
     
 
     def load_from_text(self, text: str, metadata: dict = None) -> List[Document]:
@@ -80,25 +115,37 @@ class DocumentProcessor:
         return [Document(page_content=text, metadata=metadata)]
     
 
-    def split_documents(self, documents: List[Document]) -> List[Document]:
+    def split_documents(self, documents: List[Document], extra_metadata: dict = None) -> List[Document]:
         """
         Split documents into smaller chunks.
         
+        Uses a single-pass splitter that breaks on paragraph, line, then
+        word boundaries (see core.fast_splitter).
+        
         Args:
             documents: List of Document objects
+            extra_metadata: Metadata added to every chunk (e.g. {"source": name})
             
         Returns:
             List of chunked Document objects
         """
-        return self.text_splitter.split_documents(documents)
+        chunks = []
+        for doc in documents:
+            metadata = {**doc.metadata, **extra_metadata} if extra_metadata else doc.metadata
+            chunks.extend(
+                Document(page_content=chunk, metadata=dict(metadata))
+                for chunk in split_text(doc.page_content, self.chunk_size, self.chunk_overlap)
+            )
+        return chunks
     
 
-    def process(self, file_path: str) -> List[Document]:
+    def process(self, file_path: str, extra_metadata: dict = None) -> List[Document]:
         """
         Complete pipeline: load and split a document.
         
         Args:
             file_path: Path to the document file
+            extra_metadata: Metadata added to every chunk (e.g. {"source": name})
             
         Returns:
             List of chunked Document objects ready for embedding
@@ -107,7 +154,7 @@ class DocumentProcessor:
         documents = self.load_document(file_path)
         
         # Step 2: Split into chunks
-        chunks = self.split_documents(documents)
+        chunks = self.split_documents(documents, extra_metadata)
         
         return chunks
     
@@ -127,9 +174,27 @@ class DocumentProcessor:
         return self.split_documents(documents)
     
 
+@functools.lru_cache(maxsize=8)
+def get_processor(chunk_size: int = None, chunk_overlap: int = None) -> DocumentProcessor:
+    """
+    Get a shared DocumentProcessor for the given chunking parameters.
+    
+    The processor is stateless after construction, so one instance per
+    (chunk_size, chunk_overlap) is reused across uploads and sessions.
+    
+    Args:
+        chunk_size: Maximum size of each text chunk (default from settings)
+        chunk_overlap: Overlap between chunks (default from settings)
+        
+    Returns:
+        DocumentProcessor instance
+    """
+    return DocumentProcessor(chunk_size, chunk_overlap)
+
+
 if __name__ == "__main__":
     # Example usage
-    processor = DocumentProcessor()
+    processor = get_processor(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
     file_path = "input_data\CLARiTy A Vision Transformer for Multi-Label Classification.pdf"  
     chunks = processor.process(file_path)
     print(f"Processed {len(chunks)} chunks from {file_path}")
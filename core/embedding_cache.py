@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store for embedding vectors.
+
+    Vectors are keyed by a hash of (model name, text) and stored as float16
+    bytes in a SQLite database, so re-embedding the same chunk or query is a
+    single indexed lookup instead of a transformer forward pass.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            path: Path of the SQLite database file (created if missing)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Streamlit serves sessions from several threads; one shared
+        # connection guarded by a lock keeps writes serialized.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Fetch cached vectors for the given keys in one transaction.
+
+        Args:
+            keys: Content hashes to look up
+
+        Returns:
+            Dictionary mapping each cached key to its float32 vector
+        """
+        if not keys:
+            return {}
+
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # Stay below SQLite's default limit on bound parameters
+        batch = 900
+        with self._lock:
+            for start in range(0, len(unique_keys), batch):
+                chunk = unique_keys[start:start + batch]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        """
+        Store vectors in the cache as float16 bytes.
+
+        Args:
+            items: Iterable of (key, vector) pairs
+        """
+        rows = [
+            (key, np.asarray(vector, dtype=np.float16).tobytes())
+            for key, vector in items
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
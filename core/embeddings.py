@@ -1,35 +1,137 @@
-from typing import List
-from langchain_huggingface import HuggingFaceEmbeddings
+import functools
+import hashlib
+from typing import List, Optional, Tuple, Union
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
 
 from config.settings import settings
+from core.embedding_cache import EmbeddingCache
+from core.onnx_embedder import OnnxEmbedder
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding_model(model_name: str, backend: str = "torch") -> Union[SentenceTransformer, OnnxEmbedder]:
+    """
+    Load an embedding model once per process.
+    
+    Shared by every EmbeddingManager (and therefore every Streamlit session)
+    so the weights are downloaded and loaded into memory only once.
+    
+    Args:
+        model_name: HuggingFace model name
+        backend: "torch" (Sentence Transformers) or "onnx" (int8 ONNX Runtime)
+        
+    Returns:
+        Model exposing a SentenceTransformer-compatible encode()
+        
+    Raises:
+        ValueError: If the backend is not supported
+    """
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu")  # Use CPU for compatibility
+    if backend == "onnx":
+        return OnnxEmbedder(model_name)
+    raise ValueError(f"Unsupported embedding backend: {backend}. Use torch or onnx")
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding_cache(path: str) -> EmbeddingCache:
+    """Open the on-disk embedding cache once per process."""
+    return EmbeddingCache(path)
+
+
+class _ManagedEmbeddings(Embeddings):
+    """LangChain adapter that routes embedding calls through an EmbeddingManager."""
+
+    def __init__(self, manager: "EmbeddingManager"):
+        self._manager = manager
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._manager.embed_texts(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._manager.embed_query(text)
 
 
 class EmbeddingManager:
     """
-    Manages text embeddings using HuggingFace models.
+    Manages text embeddings using Sentence Transformers models, run either
+    with PyTorch or as an int8-quantized ONNX Runtime model
+    (EMBEDDING_BACKEND setting).
 
     """
     
-    def __init__(self, model_name: str = None):
+    def __init__(
+        self,
+        model_name: str = None,
+        cache_path: str = None,
+        batch_size: int = None,
+        backend: str = None
+    ):
         """
         Initialize the embedding manager.
         
         Args:
             model_name: HuggingFace model name (default from settings)
+            cache_path: On-disk embedding cache path (default from settings,
+                empty string disables the cache)
+            batch_size: Encoder batch size (default from settings)
+            backend: "torch" or "onnx" (default from settings)
         """
         self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.backend = (backend or settings.EMBEDDING_BACKEND).lower()
+        cache_path = settings.EMBEDDING_CACHE_PATH if cache_path is None else cache_path
+        self._cache: Optional[EmbeddingCache] = get_embedding_cache(cache_path) if cache_path else None
         
-        # Initialize HuggingFace embeddings (downloads model on first use)
-        self._embeddings = HuggingFaceEmbeddings(
-            model_name=self.model_name,
-            model_kwargs={"device": "cpu"},  # Use CPU for compatibility
-            encode_kwargs={"normalize_embeddings": True}  # Normalize for cosine similarity
-        )
+        # Shared encoder, loaded on first embed so startup stays fast
+        self._model: Optional[Union[SentenceTransformer, OnnxEmbedder]] = None
+        
+        # LangChain-facing adapter so vector stores also hit the cache
+        self._adapter = _ManagedEmbeddings(self)
+        
+        # In-process LRU on top of the on-disk cache for repeated queries
+        self._cached_query = functools.lru_cache(maxsize=1024)(self._embed_query_uncached)
+    
+    @property
+    def model(self) -> Union[SentenceTransformer, OnnxEmbedder]:
+        """Get the underlying encoder model, loading it on first access."""
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name, self.backend)
+        return self._model
     
     @property
-    def embeddings(self) -> HuggingFaceEmbeddings:
-        """Get the embeddings model instance."""
-        return self._embeddings
+    def embeddings(self) -> Embeddings:
+        """Get the LangChain embeddings interface (cache-aware)."""
+        return self._adapter
+    
+    def _cache_key(self, text: str) -> str:
+        """Content hash identifying an embedding for this model."""
+        # Quantized vectors differ slightly, so key them separately
+        model_key = self.model_name if self.backend == "torch" else f"{self.model_name}:{self.backend}-int8"
+        return hashlib.sha256(f"{model_key}\0{text}".encode("utf-8")).hexdigest()
+    
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """
+        Run the encoder on a batch of texts, bypassing the cache.
+        
+        Args:
+            texts: List of texts to embed
+            
+        Returns:
+            List of normalized embedding vectors
+        """
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,  # Normalize for cosine similarity
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+    
+    def _embed_query_uncached(self, text: str) -> Tuple[float, ...]:
+        return tuple(self.embed_texts([text])[0])
     
     def embed_query(self, text: str) -> List[float]:
         """
@@ -41,19 +143,39 @@ class EmbeddingManager:
         Returns:
             List of floats representing the embedding vector
         """
-        return self._embeddings.embed_query(text)
+        return list(self._cached_query(text))
     
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Create embeddings for multiple texts.
         
+        Only texts missing from the on-disk cache are sent to the model.
+        
         Args:
             texts: List of texts to embed
             
         Returns:
             List of embedding vectors
         """
-        return self._embeddings.embed_documents(texts)
+        if self._cache is None:
+            return self.encode(texts)
+        
+        keys = [self._cache_key(text) for text in texts]
+        cached = self._cache.get_many(keys)
+        
+        # Embed each distinct missing text once
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            vectors = self.encode(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._cache.put_many(computed.items())
+        else:
+            computed = {}
+        
+        return [
+            computed[key] if key in computed else cached[key].tolist()
+            for key in keys
+        ]
     
     def get_embedding_dimension(self, text: str = "sample") -> int:
         """
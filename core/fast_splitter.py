@@ -0,0 +1,94 @@
+import re
+from bisect import bisect_left
+from typing import List
+
+
+# Break points in order of preference: paragraph, line, word
+_SEPARATOR_RE = re.compile(r"\n\n|\n| ")
+_PRIORITY = {"\n\n": 2, "\n": 1, " ": 0}
+
+
+def _best_break(starts: List[int], priorities: List[int], lo: int, hi: int) -> int:
+    """
+    Pick the preferred separator starting within [lo, hi].
+
+    Args:
+        starts: Sorted separator start offsets
+        priorities: Priority of each separator (higher is preferred)
+        lo: Lowest acceptable offset
+        hi: Highest acceptable offset
+
+    Returns:
+        Offset of the highest-priority (then latest) separator, or -1 if none
+    """
+    best, best_priority = -1, -1
+    i = bisect_left(starts, lo)
+    while i < len(starts) and starts[i] <= hi:
+        if priorities[i] >= best_priority:
+            best, best_priority = starts[i], priorities[i]
+        i += 1
+    return best
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int = 0) -> List[str]:
+    """
+    Split text into chunks of at most chunk_size characters in one pass.
+
+    Separator offsets are found once with a precompiled regex; chunks are
+    then packed greedily, breaking on the strongest separator (paragraph,
+    then line, then word) in the back half of each window, and hard-cut
+    only when a window contains no separator at all. Consecutive chunks
+    overlap by up to chunk_overlap characters, starting on a word boundary.
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum size of each chunk
+        chunk_overlap: Maximum overlap between consecutive chunks
+
+    Returns:
+        List of non-empty, whitespace-stripped chunks
+
+    Raises:
+        ValueError: If chunk_overlap is not smaller than chunk_size
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError(
+            f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})"
+        )
+
+    starts, ends, priorities = [], [], []
+    for match in _SEPARATOR_RE.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+        priorities.append(_PRIORITY[match.group()])
+
+    chunks = []
+    length = len(text)
+    start = 0
+
+    while start < length:
+        limit = start + chunk_size
+        if limit >= length:
+            end = length
+        else:
+            end = _best_break(starts, priorities, start + chunk_size // 2, limit)
+            if end <= start:
+                end = _best_break(starts, priorities, start + 1, limit)
+            if end <= start:
+                end = limit
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= length:
+            break
+
+        # Start the next chunk on the first word boundary inside the overlap
+        next_start = end
+        if chunk_overlap:
+            i = bisect_left(ends, end - chunk_overlap)
+            if i < len(ends) and start < ends[i] < end:
+                next_start = ends[i]
+        start = next_start
+
+    return chunks
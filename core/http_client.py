@@ -0,0 +1,42 @@
+import functools
+
+import httpx
+
+
+# Idle connections kept open per client for reuse across requests
+MAX_KEEPALIVE_CONNECTIONS = 8
+
+# Fallback timeout; API SDKs usually pass their own per request
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+
+
+@functools.lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    """
+    Get the process-wide HTTP/2 client with keep-alive.
+    
+    Sharing one client keeps TLS connections warm across requests and
+    sessions, and HTTP/2 multiplexes concurrent requests to the same host.
+    
+    Returns:
+        httpx.Client instance
+    """
+    return httpx.Client(http2=True, limits=_limits(), timeout=HTTP_TIMEOUT)
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide async HTTP/2 client with keep-alive.
+    
+    Async streams are driven on the single background loop from
+    core.streaming, so the client's connection pool stays bound to it.
+    
+    Returns:
+        httpx.AsyncClient instance
+    """
+    return httpx.AsyncClient(http2=True, limits=_limits(), timeout=HTTP_TIMEOUT)
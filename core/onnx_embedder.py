@@ -0,0 +1,230 @@
+import json
+import os
+import platform
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+# Optional dependency: only needed when EMBEDDING_BACKEND=onnx
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoConfig, AutoTokenizer
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError
+except ImportError:
+    ort = None
+
+
+# File written by ORTQuantizer.quantize (default "quantized" suffix)
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+# Pooling flags of a Sentence Transformers Pooling module -> mode reproduced here
+_POOLING_MODES = {
+    "pooling_mode_mean_tokens": "mean",
+    "pooling_mode_cls_token": "cls",
+}
+
+
+def _cpu_flags() -> Set[str]:
+    """CPU feature flags from /proc/cpuinfo (empty where unavailable)."""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def _quantization_config():
+    """
+    Pick the dynamic int8 quantization config for this CPU.
+    
+    VNNI CPUs get int8 dot-product kernels (VPDPBUSD); others fall back to
+    the AVX-512, ARM64 or AVX2 configs.
+    """
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    
+    flags = _cpu_flags()
+    if "avx512_vnni" in flags:
+        return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    if "avx512f" in flags:
+        return AutoQuantizationConfig.avx512(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+
+def _load_model_json(model_name: str, filename: str) -> Optional[dict]:
+    """Read a JSON file from the model repo (or local model dir); None if absent."""
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        if not os.path.exists(path):
+            return None
+    else:
+        try:
+            path = hf_hub_download(model_name, filename)
+        except EntryNotFoundError:
+            return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _sentence_transformers_config(model_name: str) -> Tuple[str, Optional[int]]:
+    """
+    Read the pooling mode and max sequence length Sentence Transformers uses.
+
+    Args:
+        model_name: HuggingFace model name or local model directory
+
+    Returns:
+        Tuple of (pooling mode, max sequence length or None for the
+        tokenizer's own limit)
+
+    Raises:
+        ValueError: If the model's pipeline can't be reproduced here
+    """
+    modules = _load_model_json(model_name, "modules.json")
+    if modules is None:
+        # Plain transformers checkpoint: Sentence Transformers adds mean pooling
+        return "mean", None
+
+    pooling = "mean"
+    for module in modules:
+        module_type = module.get("type", "")
+        if module_type.endswith((".Transformer", ".Normalize")):
+            # Normalization is applied by encode(normalize_embeddings=True)
+            continue
+        if not module_type.endswith(".Pooling"):
+            raise ValueError(
+                f"EMBEDDING_BACKEND=onnx does not support {module_type} modules ({model_name}). "
+                "Use EMBEDDING_BACKEND=torch"
+            )
+        config = _load_model_json(model_name, f"{module['path']}/config.json") or {}
+        enabled = [key for key, value in config.items() if key.startswith("pooling_mode_") and value]
+        if len(enabled) != 1 or enabled[0] not in _POOLING_MODES:
+            raise ValueError(
+                f"EMBEDDING_BACKEND=onnx supports mean or CLS pooling only, {model_name} uses "
+                f"{', '.join(enabled) or 'none'}. Use EMBEDDING_BACKEND=torch"
+            )
+        pooling = _POOLING_MODES[enabled[0]]
+
+    st_config = _load_model_json(model_name, "sentence_bert_config.json") or {}
+    return pooling, st_config.get("max_seq_length")
+
+
+class OnnxEmbedder:
+    """
+    Sentence embedding model running on ONNX Runtime with int8 weights.
+
+    The HuggingFace model is exported to ONNX and dynamically quantized once,
+    then cached on disk. Pooling (mean or CLS) and truncation length follow
+    the model's Sentence Transformers config, so vectors match the torch
+    backend; models needing other modules are rejected.
+    """
+
+    def __init__(self, model_name: str, model_dir: str = None, max_seq_length: int = None):
+        """
+        Initialize the ONNX embedder, exporting and quantizing on first use.
+
+        Args:
+            model_name: HuggingFace model name
+            model_dir: Directory for exported models (default from settings)
+            max_seq_length: Maximum tokens per text (default from the model config)
+
+        Raises:
+            ImportError: If optimum[onnxruntime] is not installed
+            ValueError: If the model's pooling can't be reproduced
+        """
+        if ort is None:
+            raise ImportError(
+                "EMBEDDING_BACKEND=onnx requires optimum[onnxruntime]. "
+                "Install it with: pip install 'optimum[onnxruntime]'"
+            )
+
+        self.model_name = model_name
+        self.pooling, config_max_seq_length = _sentence_transformers_config(model_name)
+        self.max_seq_length = max_seq_length or config_max_seq_length
+        self.model_dir = os.path.join(model_dir or settings.ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+        model_path = os.path.join(self.model_dir, QUANTIZED_MODEL_FILE)
+        if not os.path.exists(model_path):
+            self._export_quantized()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = [node.name for node in self._session.get_inputs()]
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        if self.max_seq_length is None:
+            # Same default as Sentence Transformers' Transformer module
+            max_positions = getattr(AutoConfig.from_pretrained(self.model_dir), "max_position_embeddings", None)
+            self.max_seq_length = min(
+                length for length in (max_positions, self._tokenizer.model_max_length) if length
+            )
+
+    def _export_quantized(self) -> None:
+        """Export the model to ONNX and write an int8 dynamically-quantized copy."""
+        model = ORTModelForFeatureExtraction.from_pretrained(
+            self.model_name,
+            export=True,
+            provider="CPUExecutionProvider"
+        )
+        model.save_pretrained(self.model_dir)
+        AutoTokenizer.from_pretrained(self.model_name).save_pretrained(self.model_dir)
+
+        quantizer = ORTQuantizer.from_pretrained(self.model_dir)
+        quantizer.quantize(save_dir=self.model_dir, quantization_config=_quantization_config())
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = True,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """
+        Embed texts (signature mirrors SentenceTransformer.encode).
+
+        Args:
+            texts: List of texts to embed
+            batch_size: Texts per ONNX Runtime call
+            convert_to_numpy: Accepted for compatibility; output is always numpy
+            normalize_embeddings: L2-normalize the pooled vectors
+            show_progress_bar: Accepted for compatibility; ignored
+
+        Returns:
+            (N, d) float32 array of embeddings
+        """
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self._tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feed = {name: inputs[name].astype(np.int64) for name in self._input_names if name in inputs}
+            token_embeddings = self._session.run(["last_hidden_state"], feed)[0]
+
+            if self.pooling == "cls":
+                batches.append(token_embeddings[:, 0])
+            else:
+                # Mean pooling over non-padding tokens
+                mask = inputs["attention_mask"][..., None].astype(np.float32)
+                summed = (token_embeddings * mask).sum(axis=1)
+                batches.append(summed / np.clip(mask.sum(axis=1), 1e-9, None))
+
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors = np.vstack(batches).astype(np.float32)
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
@@ -0,0 +1,136 @@
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import faiss
+import numpy as np
+
+from config.settings import settings
+
+
+@dataclass
+class CachedResponse:
+    """A cached value together with its similarity to the looked-up query."""
+    value: Any
+    score: float
+    ts: float
+
+
+class SemanticCache:
+    """
+    Small in-memory cache keyed by query embeddings.
+
+    A lookup is a single inner-product search against the cached query
+    vectors (normalized, so the score is cosine similarity). Paraphrased
+    repeats of a question that score above the threshold reuse the cached
+    value instead of re-running retrieval and generation.
+    """
+
+    def __init__(self, threshold: float = None, maxsize: int = None, ttl: float = None):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit (default from settings)
+            maxsize: Maximum number of entries, oldest evicted first (default from settings)
+            ttl: Seconds an entry stays valid (None means no expiry)
+        """
+        self.threshold = threshold if threshold is not None else settings.SEMANTIC_CACHE_THRESHOLD
+        self.maxsize = maxsize if maxsize is not None else settings.SEMANTIC_CACHE_SIZE
+        self.ttl = ttl
+
+        # Index is created on first insert, once the embedding dimension is known
+        self._index: Optional[faiss.IndexFlatIP] = None
+        self._values: List[Any] = []
+        self._timestamps: List[float] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _as_row(query_vec) -> np.ndarray:
+        return np.asarray(query_vec, dtype=np.float32).reshape(1, -1)
+
+    def _remove_oldest(self, n: int) -> None:
+        """Drop the n oldest entries (caller holds the lock)."""
+        # Flat indexes compact on removal, so positions stay aligned
+        # with the parallel value list
+        self._index.remove_ids(np.arange(n, dtype=np.int64))
+        del self._values[:n]
+        del self._timestamps[:n]
+
+    def _evict_expired(self) -> None:
+        """
+        Drop expired entries (caller holds the lock).
+
+        Entries are stored in insertion order, so the expired ones are a
+        prefix. Left in place, a stale entry would keep winning the top-1
+        search (and ties against newer copies) and block fresh hits.
+        """
+        if self.ttl is None or self._index is None:
+            return
+        expired = bisect_left(self._timestamps, time.time() - self.ttl)
+        if expired:
+            self._remove_oldest(expired)
+
+    def lookup(self, query_vec) -> Optional[CachedResponse]:
+        """
+        Find the most similar cached entry.
+
+        Args:
+            query_vec: Normalized query embedding
+
+        Returns:
+            CachedResponse if the best unexpired match clears the
+            threshold, else None
+        """
+        with self._lock:
+            self._evict_expired()
+            if self._index is None or self._index.ntotal == 0:
+                return None
+
+            scores, ids = self._index.search(self._as_row(query_vec), 1)
+            score, idx = float(scores[0, 0]), int(ids[0, 0])
+            if idx < 0 or score < self.threshold:
+                return None
+
+            return CachedResponse(
+                value=self._values[idx],
+                score=score,
+                ts=self._timestamps[idx]
+            )
+
+    def add(self, query_vec, value: Any) -> None:
+        """
+        Cache a value under a query embedding.
+
+        Args:
+            query_vec: Normalized query embedding
+            value: Value to return for similar queries
+        """
+        if self.maxsize <= 0:
+            return
+
+        row = self._as_row(query_vec)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexFlatIP(row.shape[1])
+
+            self._evict_expired()
+            if self._index.ntotal >= self.maxsize:
+                self._remove_oldest(self._index.ntotal - self.maxsize + 1)
+
+            self._index.add(row)
+            self._values.append(value)
+            self._timestamps.append(time.time())
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            if self._index is not None:
+                self._index.reset()
+            self._values.clear()
+            self._timestamps.clear()
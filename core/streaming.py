@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, TypeVar
+
+from config.settings import settings
+
+T = TypeVar("T")
+
+
+# Streaming optimization modes: (flush after N chars, flush after N seconds).
+# "off" forwards every fragment; "strong" also makes the UI render plain
+# text while streaming and markdown once at the end.
+STREAM_MODES = {
+    "off": (1, 0.0),
+    "balanced": (64, 0.05),
+    "strong": (256, 0.15),
+}
+
+
+class _ChunkBuffer:
+    """Accumulates text fragments and decides when to flush them."""
+
+    def __init__(self, mode: str = None):
+        mode = mode or settings.STREAM_OPTIMIZATION_MODE
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Unsupported stream optimization mode: {mode}. Use off, balanced or strong")
+        self.flush_chars, self.flush_interval = STREAM_MODES[mode]
+        self._parts = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, chunk: str) -> Optional[str]:
+        """Buffer a fragment; return the joined buffer if it should be flushed."""
+        if not chunk:
+            return None
+        self._parts.append(chunk)
+        self._size += len(chunk)
+        if (
+            self._size >= self.flush_chars
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Return and reset whatever is buffered (None if empty)."""
+        self._last_flush = time.monotonic()
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        return text
+
+
+def buffer_chunks(chunks: Iterable[str], mode: str = None) -> Iterator[str]:
+    """
+    Coalesce small streamed LLM fragments by size and time.
+
+    Each yielded piece triggers a UI re-render in st.write_stream, so
+    forwarding 1-3 token fragments individually is wasteful.
+
+    Args:
+        chunks: Stream of text fragments
+        mode: "off", "balanced" or "strong" (default from settings)
+
+    Yields:
+        Concatenated fragments
+    """
+    buffer = _ChunkBuffer(mode)
+    for chunk in chunks:
+        text = buffer.add(chunk)
+        if text is not None:
+            yield text
+
+    text = buffer.flush()
+    if text is not None:
+        yield text
+
+
+async def abuffer_chunks(chunks: AsyncIterable[str], mode: str = None) -> AsyncIterator[str]:
+    """Async counterpart of buffer_chunks."""
+    buffer = _ChunkBuffer(mode)
+    async for chunk in chunks:
+        text = buffer.add(chunk)
+        if text is not None:
+            yield text
+
+    text = buffer.flush()
+    if text is not None:
+        yield text
+
+
+# One long-lived event loop for driving async code from sync callers.
+# Async HTTP clients (e.g. the shared ChatGroq) bind their connection
+# pools to a loop, so a fresh asyncio.run() per call would break reuse.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_DONE = object()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-stream-loop", daemon=True).start()
+    return _loop
+
+
+async def _anext(iterator: AsyncIterator[T]):
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _DONE
+
+
+async def _aclose(iterator: AsyncIterator[T]) -> None:
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+def iterate_async(iterable: AsyncIterable[T]) -> Iterator[T]:
+    """
+    Consume an async iterable from synchronous code (e.g. st.write_stream).
+
+    Items are produced on a shared background event loop; closing the
+    returned generator early also closes the async iterator.
+
+    Args:
+        iterable: Async iterable to drive
+
+    Yields:
+        Items of the async iterable
+    """
+    loop = _background_loop()
+    iterator = iterable.__aiter__()
+    try:
+        while True:
+            item = asyncio.run_coroutine_threadsafe(_anext(iterator), loop).result()
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        asyncio.run_coroutine_threadsafe(_aclose(iterator), loop).result()
@@ -1,28 +1,87 @@
+import asyncio
+import functools
+import logging
+import math
 import os
-from typing import List, Optional
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import faiss
+import numpy as np
 from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 
 from config.settings import settings
 from core.embeddings import EmbeddingManager
 
+logger = logging.getLogger(__name__)
+
+
+# Graph degree for HNSW indexes
+HNSW_M = 32
+
+# Successive adds within this window are persisted by a single save
+SAVE_DEBOUNCE_SECONDS = 2.0
+
+# Recent (query, k) searches whose result ids are kept in memory
+SEARCH_CACHE_SIZE = 256
+
+# Index file headers (FAISS fourcc codes) of the types that can be mapped:
+# flat codes in place (needs IO_FLAG_MMAP_IFC), IVF lists as on-disk lists
+_FLAT_FOURCCS = {b"IxF2", b"IxFI"}
+_IVF_FOURCCS = {b"IwFl"}
+
 
 class VectorStoreManager:
     """
     Manages FAISS vector store operations.
     
+    Index types (INDEX_TYPE setting):
+    - flat: exact fp32 search (IndexFlatL2)
+    - hnsw: approximate graph search (IndexHNSWFlat)
+    - sq8: int8 scalar-quantized vectors, 4x smaller (IndexScalarQuantizer)
+    - ivf: inverted-file search over sqrt(N) clusters (IndexIVFFlat)
     """
     
-    def __init__(self, embedding_manager: EmbeddingManager = None):
+    def __init__(
+        self,
+        embedding_manager: EmbeddingManager = None,
+        index_type: str = None,
+        autosave_path: str = None
+    ):
         """
         Initialize the vector store manager.
         
         Args:
             embedding_manager: EmbeddingManager instance (creates one if not provided)
+            index_type: FAISS index type (default from settings)
+            autosave_path: Directory saved to in the background after
+                add_documents. Off by default; must not be shared between
+                managers (e.g. sessions), since each save replaces the files
         """
         self.embedding_manager = embedding_manager or EmbeddingManager()
         self._vector_store: Optional[FAISS] = None
         self.index_path = settings.FAISS_INDEX_PATH
+        self.autosave_path = autosave_path
+        self.index_type = (index_type or settings.INDEX_TYPE).lower()
+        
+        # Path of the saved index file while the in-memory index is a
+        # read-only memory map of it (None otherwise)
+        self._mmapped_file: Optional[str] = None
+        
+        # Writes to the store and saves to disk are serialized; saves after
+        # add_documents run on a background thread, debounced
+        self._lock = threading.RLock()
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss-save")
+        self._save_pending = False
+        
+        # Docstore ids per (query, k); cleared whenever the index changes
+        self._cached_search = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search_ids_uncached)
     
     @property
     def vector_store(self) -> Optional[FAISS]:
@@ -44,12 +103,67 @@ class VectorStoreManager:
         Returns:
             FAISS vector store instance
         """
-        self._vector_store = FAISS.from_documents(
-            documents=documents,
-            embedding=self.embedding_manager.embeddings
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        vectors = np.asarray(self.embedding_manager.embed_texts(texts), dtype=np.float32)
+        
+        self._vector_store = FAISS(
+            embedding_function=self.embedding_manager.embeddings,
+            index=self._build_index(vectors),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={}
         )
+        self._vector_store.add_embeddings(zip(texts, vectors), metadatas=metadatas)
+        self._mmapped_file = None
+        self._cached_search.cache_clear()
         return self._vector_store
     
+    def _build_index(self, vectors: np.ndarray) -> faiss.Index:
+        """
+        Build an empty FAISS index of the configured type, trained if required.
+        
+        Args:
+            vectors: (N, d) float32 matrix used to size and train the index
+            
+        Returns:
+            FAISS index ready for vectors to be added
+            
+        Raises:
+            ValueError: If the index type is not supported
+        """
+        dim = vectors.shape[1]
+        
+        if self.index_type == "flat":
+            index = faiss.IndexFlatL2(dim)
+        elif self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        elif self.index_type == "sq8":
+            index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+            # The quantizer learns each dimension's range once and is never
+            # retrained; embeddings are normalized, so fix it to [-1, 1]
+            # rather than to whatever the first upload happened to span
+            bounds = np.ones((2, dim), dtype=np.float32)
+            bounds[1] = -1.0
+            index.train(np.vstack([vectors, bounds]))
+        elif self.index_type == "ivf":
+            # L2 on normalized vectors ranks like inner product and keeps
+            # scores consistent with the other index types
+            nlist = min(int(math.sqrt(max(len(vectors), 256))), len(vectors))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        else:
+            raise ValueError(f"Unsupported index type: {self.index_type}. Use flat, hnsw, sq8 or ivf")
+        
+        if not index.is_trained:
+            index.train(vectors)
+        self._configure_index(index)
+        return index
+    
+    @staticmethod
+    def _configure_index(index: faiss.Index) -> None:
+        """Apply query-time parameters (not all are persisted with the index)."""
+        if hasattr(index, "nprobe"):
+            index.nprobe = settings.IVF_NPROBE
+    
     def add_documents(self, documents: List[Document]) -> None:
         """
         Add documents to existing vector store.
@@ -60,19 +174,51 @@ class VectorStoreManager:
         Raises:
             ValueError: If vector store is not initialized
         """
-        if not self.is_initialized:
-            # If not initialized, create new store
-            print("---create-from_documents--")
-            self.create_from_documents(documents)
-        else:
-            # Add to existing store
-            print("---vectorstore-from_documents--")
-            self._vector_store.add_documents(documents)
+        with self._lock:
+            if not self.is_initialized:
+                # If not initialized, create new store
+                logger.debug("Creating vector store from %d documents", len(documents))
+                self.create_from_documents(documents)
+            else:
+                # Add to existing store
+                logger.debug("Adding %d documents to vector store", len(documents))
+                self._ensure_writable()
+                self._vector_store.add_documents(documents)
+                self._cached_search.cache_clear()
+        
+        # Persist without blocking the caller
+        self._schedule_save()
+    
+    def _schedule_save(self) -> None:
+        """Queue a debounced background save (no-op unless autosave is enabled)."""
+        if not self.autosave_path:
+            return
+        
+        with self._lock:
+            if self._save_pending:
+                return
+            self._save_pending = True
+        self._save_executor.submit(self._background_save)
+    
+    def _background_save(self) -> None:
+        """Wait out the debounce window, then save the current store."""
+        time.sleep(SAVE_DEBOUNCE_SECONDS)
+        with self._lock:
+            self._save_pending = False
+            if not self.is_initialized:
+                return
+            try:
+                self.save(self.autosave_path)
+            except Exception:
+                logger.exception("Background vector store save failed")
 
     def search(self, query: str, k: int = None) -> List[Document]:
         """
         Search for similar documents.
         
+        Repeated searches for the same query and k (e.g. answer, then
+        sources) reuse the cached result ids and skip the index lookup.
+        
         Args:
             query: Search query text
             k: Number of results to return (default from settings)
@@ -87,7 +233,58 @@ class VectorStoreManager:
             raise ValueError("Vector store is not initialized. Add documents first.")
 
         k = k or settings.TOP_K_RESULTS
-        return self._vector_store.similarity_search(query, k=k)
+        docstore = self._vector_store.docstore
+        return [docstore.search(doc_id) for doc_id in self._cached_search(query.strip(), k)]
+    
+    def _search_ids_uncached(self, query: str, k: int) -> Tuple[str, ...]:
+        vector = np.asarray([self.embedding_manager.embed_query(query)], dtype=np.float32)
+        _, indices = self._vector_store.index.search(vector, k)
+        index_to_docstore_id = self._vector_store.index_to_docstore_id
+        return tuple(index_to_docstore_id[i] for i in indices[0] if i != -1)
+    
+    def search_by_vector(self, vector: List[float], k: int = None) -> List[Document]:
+        """
+        Search for similar documents using a precomputed query embedding.
+        
+        Args:
+            vector: Query embedding (from EmbeddingManager.embed_query)
+            k: Number of results to return (default from settings)
+            
+        Returns:
+            List of similar Document objects
+            
+        Raises:
+            ValueError: If vector store is not initialized
+        """
+        if not self.is_initialized:
+            raise ValueError("Vector store is not initialized. Add documents first.")
+
+        k = k or settings.TOP_K_RESULTS
+        return self._vector_store.similarity_search_by_vector(vector, k=k)
+    
+    async def asearch_by_vector(self, vector: List[float], k: int = None) -> List[Document]:
+        """Async version of search_by_vector."""
+        if not self.is_initialized:
+            raise ValueError("Vector store is not initialized. Add documents first.")
+
+        k = k or settings.TOP_K_RESULTS
+        return await self._vector_store.asimilarity_search_by_vector(vector, k=k)
+    
+    async def asearch(self, query: str, k: int = None) -> List[Document]:
+        """
+        Async version of search (embedding and lookup run off the event loop).
+        
+        Args:
+            query: Search query text
+            k: Number of results to return (default from settings)
+            
+        Returns:
+            List of similar Document objects
+            
+        Raises:
+            ValueError: If vector store is not initialized
+        """
+        return await asyncio.to_thread(self.search, query, k)
     
     def search_with_scores(self, query: str, k: int = None) -> List[tuple]:
         """
@@ -110,6 +307,9 @@ class VectorStoreManager:
         """
         Save vector store to disk.
         
+        Called automatically in the background after add_documents when
+        an autosave path is configured.
+        
         Args:
             path: Directory path to save (default from settings)
         """
@@ -118,12 +318,30 @@ class VectorStoreManager:
         
         save_path = path or self.index_path
         os.makedirs(save_path, exist_ok=True)
-        self._vector_store.save_local(save_path)
+        
+        # Write to a scratch directory and swap the files in, so readers
+        # (including memory-mapped indexes) never see a half-written file
+        with self._lock:
+            # A mapped IVF index would be written as an on-disk-lists stub
+            # pointing at the file being replaced, so save a real copy
+            self._ensure_writable()
+            tmp_path = tempfile.mkdtemp(prefix=".saving-", dir=save_path)
+            try:
+                self._vector_store.save_local(tmp_path)
+                for name in ("index.faiss", "index.pkl"):
+                    os.replace(os.path.join(tmp_path, name), os.path.join(save_path, name))
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
     
     def load(self, path: str = None) -> FAISS:
         """
         Load vector store from disk.
         
+        Flat indexes (on FAISS builds with IO_FLAG_MMAP_IFC) and IVF
+        indexes are memory-mapped read-only, so pages are loaded on demand
+        and shared between processes; other types are read into memory.
+        A mapped index is re-read into memory only if documents are added.
+        
         Args:
             path: Directory path to load from (default from settings)
             
@@ -135,13 +353,65 @@ class VectorStoreManager:
         if not os.path.exists(load_path):
             raise FileNotFoundError(f"No saved index found at {load_path}")
         
-        self._vector_store = FAISS.load_local(
-            load_path,
-            self.embedding_manager.embeddings,
-            allow_dangerous_deserialization=True  # Required for loading
+        index_file = os.path.join(load_path, "index.faiss")
+        mmap_flags = self._mmap_flags(index_file)
+        index = None
+        if mmap_flags:
+            try:
+                index = faiss.read_index(index_file, mmap_flags | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                # FAISS build that can't map this file
+                pass
+        if index is None:
+            index = faiss.read_index(index_file)
+            self._mmapped_file = None
+        else:
+            self._mmapped_file = index_file
+        self._configure_index(index)
+        
+        # Same pickle layout FAISS.save_local writes; only load trusted indexes
+        with open(os.path.join(load_path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        
+        self._vector_store = FAISS(
+            embedding_function=self.embedding_manager.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
         )
+        self._cached_search.cache_clear()
         return self._vector_store
     
+    @staticmethod
+    def _mmap_flags(index_file: str) -> int:
+        """
+        Read flags that memory-map this index file.
+        
+        Args:
+            index_file: Path of the saved FAISS index
+            
+        Returns:
+            FAISS IO flags, or 0 if this index type (or FAISS build) can't
+            be mapped and would be silently read into memory anyway
+        """
+        with open(index_file, "rb") as f:
+            fourcc = f.read(4)
+        if fourcc in _IVF_FOURCCS:
+            return faiss.IO_FLAG_MMAP
+        if fourcc in _FLAT_FOURCCS:
+            return getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        return 0
+    
+    def _ensure_writable(self) -> None:
+        """Load a private in-memory copy of a memory-mapped index before mutating it."""
+        if self._mmapped_file is not None:
+            # Mapped IVF lists are on-disk lists, which clone_index rejects,
+            # so re-read the file without mapping instead
+            index = faiss.read_index(self._mmapped_file)
+            self._configure_index(index)
+            self._vector_store.index = index
+            self._mmapped_file = None
+    
     def get_retriever(self, k: int = None):
         """
         Get a retriever interface for the vector store.
@@ -163,7 +433,10 @@ class VectorStoreManager:
     
     def clear(self) -> None:
         """Clear the vector store from memory."""
-        self._vector_store = None
+        with self._lock:
+            self._vector_store = None
+            self._mmapped_file = None
+            self._cached_search.cache_clear()
 
 
 
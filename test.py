@@ -1,12 +1,13 @@
 
 from core.embeddings import EmbeddingManager
 from core.vector_store import VectorStoreManager
-from core.document_processor import DocumentProcessor
+from config.settings import settings
+from core.document_processor import get_processor
 
 file_path = r"input_data\CLARiTy A Vision Transformer for Multi-Label Classification.pdf"
 
 # step 1. loading documents and creating chunks using DocumentProcessor
-processor = DocumentProcessor()
+processor = get_processor(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
 chunks = processor.process(file_path)
 print("--------- Document Processor Test ---------\n")
 print(f"Loaded and processed {len(chunks)} document chunks.\n")
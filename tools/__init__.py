@@ -1,3 +1,3 @@
-from tools.tavily_search import TavilySearchTool
+from tools.tavily_search import TavilySearchTool, format_context, get_tavily_tool
 
-__all__ = ["TavilySearchTool"]
\ No newline at end of file
+__all__ = ["TavilySearchTool", "format_context", "get_tavily_tool"]
\ No newline at end of file
@@ -1,8 +1,48 @@
+import functools
+import hashlib
 import os
-from typing import List, Optional, Literal
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Literal, Tuple
+from cachetools import TTLCache
 from langchain_tavily import TavilySearch
 
 from config.settings import settings
+from core.embeddings import EmbeddingManager
+from core.semantic_cache import SemanticCache
+
+
+# langchain-tavily reads the API key from the environment; set it once at import
+if settings.TAVILY_API_KEY:
+    os.environ["TAVILY_API_KEY"] = settings.TAVILY_API_KEY
+
+
+def format_context(doc_results: List, web_text: Optional[str] = None) -> str:
+    """
+    Build the LLM context from document chunks and web search text.
+    
+    Args:
+        doc_results: Retrieved document chunks
+        web_text: Formatted web search results
+        
+    Returns:
+        Formatted context string
+    """
+    if not doc_results and not web_text:
+        return "No context available."
+    
+    # Document context
+    parts = ["=== From Your Documents ==="] if doc_results else []
+    parts += [
+        f"[Doc {i}] ({doc.metadata.get('source', 'Unknown')}):\n{doc.page_content}"
+        for i, doc in enumerate(doc_results or (), 1)
+    ]
+    
+    # Web context
+    if web_text:
+        parts += ("\n=== From Web Search ===", web_text)
+    
+    return "\n\n".join(parts)
 
 
 class TavilySearchTool:
@@ -15,12 +55,16 @@ class TavilySearchTool:
     - User explicitly asks to search the web
     
     Tavily provides high-quality, AI-optimized search results.
+    
+    Results are cached for TAVILY_CACHE_TTL seconds, keyed by the normalized
+    query; with an embedding manager, near-duplicate queries also hit.
     """
     
     def __init__(
         self,
         max_results: int = 3,
-        topic: Literal["general", "news", "finance"] = "general"
+        topic: Literal["general", "news", "finance"] = "general",
+        embedding_manager: EmbeddingManager = None
     ):
         """
         Initialize the Tavily search tool.
@@ -28,12 +72,24 @@ class TavilySearchTool:
         Args:
             max_results: Maximum number of search results
             topic: Search topic - "general", "news", or "finance"
+            embedding_manager: Optional EmbeddingManager enabling the
+                near-duplicate (semantic) cache layer
         """
         self.max_results = max_results
         self.topic = topic
+        self.embedding_manager = embedding_manager
+        
+        # Exact-match cache, then embedding-similarity cache for paraphrases
+        self._cache = TTLCache(maxsize=512, ttl=settings.TAVILY_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        self._semantic_cache = (
+            SemanticCache(maxsize=512, ttl=settings.TAVILY_CACHE_TTL)
+            if embedding_manager is not None else None
+        )
         
-        # Set Tavily API key in environment (required by langchain-tavily)
-        os.environ["TAVILY_API_KEY"] = settings.TAVILY_API_KEY
+        # Searches currently running, so concurrent identical queries
+        # (e.g. from several sessions) share one API call
+        self._inflight: Dict[bytes, Future] = {}
         
         # Initialize Tavily search
         self._search = TavilySearch(
@@ -46,47 +102,190 @@ class TavilySearchTool:
         """Get the Tavily search tool instance."""
         return self._search
     
-    def search(self, query: str) -> str:
+    def search(self, query: str, query_vec: List[float] = None) -> dict:
         """
-        Perform a web search and return formatted string.
+        Perform a web search and return formatted results.
+        
+        Repeat calls for the same query are served from cache, so callers
+        can re-request results (e.g. for sources) without another API call.
         
         Args:
             query: Search query
+            query_vec: Precomputed query embedding for the semantic cache
+                (skips re-embedding, e.g. when shared with document search)
             
         Returns:
-            Search results as formatted string and url
+            Dictionary with 'text' (formatted results) and 'urls' (result URLs)
         """
-        results = self._search.invoke(query)
+        results = self._invoke(query, query_vec)
         return self._format_results(results)
     
-    def _format_results(self, results: dict) -> str:
+    def search_many(self, queries: List[str]) -> List[dict]:
+        """
+        Perform several web searches at once.
+        
+        Cached queries are answered locally; the remaining unique queries
+        go out together through TavilySearch.batch, which runs them
+        concurrently.
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            One {'text', 'urls'} dictionary per query, in input order
+        """
+        raw = {}
+        misses = {}
+        for query in queries:
+            key = self._cache_key(query)
+            if key in raw or key in misses:
+                continue
+            cached, query_vec = self._lookup(key, query)
+            if cached is not None:
+                raw[key] = cached
+            else:
+                misses[key] = (query, query_vec)
+        
+        if misses:
+            fetched = self._search.batch([query for query, _ in misses.values()])
+            for (key, (_, query_vec)), results in zip(misses.items(), fetched):
+                self._store(key, query_vec, results)
+                raw[key] = results
+        
+        return [self._format_results(raw[self._cache_key(query)]) for query in queries]
+    
+    def _cache_key(self, query: str) -> bytes:
+        """Key for the exact-match cache: normalized query + search options."""
+        return hashlib.blake2b(
+            f"{query.lower().strip()}\0{self.topic}\0{self.max_results}".encode("utf-8")
+        ).digest()
+    
+    def _invoke(self, query: str, query_vec: List[float] = None) -> dict:
+        """
+        Run a Tavily search, serving repeat and near-repeat queries from cache.
+        
+        Args:
+            query: Search query
+            query_vec: Precomputed query embedding (optional)
+            
+        Returns:
+            Raw Tavily results dictionary
+        """
+        key = self._cache_key(query)
+        cached, query_vec = self._lookup(key, query, query_vec)
+        if cached is not None:
+            return cached
+        
+        # Join an identical search that is already running, if any
+        with self._cache_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        
+        try:
+            results = self._search.invoke(query)
+            self._store(key, query_vec, results)
+            future.set_result(results)
+            return results
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+    
+    def _lookup(
+        self,
+        key: bytes,
+        query: str,
+        query_vec: List[float] = None
+    ) -> Tuple[Optional[dict], Optional[list]]:
         """
-        Format Tavily results dictionary into readable string.
+        Check the exact-match cache, then the semantic cache.
+        
+        Args:
+            key: Exact-match cache key for the query
+            query: Search query
+            query_vec: Precomputed query embedding (embedded here if None)
+            
+        Returns:
+            Tuple of (cached results or None, query embedding or None)
+        """
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached, None
+        
+        if self._semantic_cache is None:
+            return None, None
+        
+        if query_vec is None:
+            query_vec = self.embedding_manager.embed_query(query)
+        hit = self._semantic_cache.lookup(query_vec)
+        if hit is not None:
+            return hit.value, query_vec
+        return None, query_vec
+    
+    @staticmethod
+    def _is_cacheable(results) -> bool:
+        """
+        Whether results are worth caching.
+        
+        TavilySearch returns {"error": ...} instead of raising on network,
+        rate-limit and auth failures; caching that (or an empty result)
+        would answer the query and its paraphrases with nothing until the
+        TTL expires.
+        """
+        return (
+            isinstance(results, dict)
+            and "error" not in results
+            and bool(results.get("results") or results.get("answer"))
+        )
+    
+    def _store(self, key: bytes, query_vec: Optional[list], results: dict) -> None:
+        """Add fresh results to both cache layers (failed or empty results are skipped)."""
+        if not self._is_cacheable(results):
+            return
+        with self._cache_lock:
+            self._cache[key] = results
+        if query_vec is not None:
+            self._semantic_cache.add(query_vec, results)
+    
+    def _format_results(self, results: dict) -> dict:
+        """
+        Format Tavily results dictionary into readable string plus URLs.
         
         Args:
             results: Raw Tavily results dictionary
             
         Returns:
-            Formatted string of search results and url
+            Dictionary with 'text' (formatted results) and 'urls' (result URLs)
         """
         if not results:
-            return "No search results found."
+            return {"text": "No search results found.", "urls": []}
         
         formatted_parts = []
+        urls = []
         
         # Add answer if available
         if results.get("answer"):
             formatted_parts.append(f"Summary: {results['answer']}")
         
         # Add individual results
-        if results.get("results"):
-            for i, result in enumerate(results["results"], 1):
-                title = result.get("title", "No title")
-                content = result.get("content", "No content")
-                url = result.get("url", "")
-                formatted_parts.append(f"[{i}] {title}\n{content}\nSource: {url}")
+        for i, result in enumerate(results.get("results") or [], 1):
+            title = result.get("title", "No title")
+            content = result.get("content", "No content")
+            url = result.get("url", "")
+            urls.append(url)
+            formatted_parts.append(f"[{i}] {title}\n{content}\nSource: {url}")
         
-        return "\n\n".join(formatted_parts) if formatted_parts else "No results found.", url
+        return {
+            "text": "\n\n".join(formatted_parts) if formatted_parts else "No results found.",
+            "urls": urls
+        }
     
     def search_with_context(self, query: str) -> dict:
         """
@@ -98,7 +297,7 @@ class TavilySearchTool:
         Returns:
             Dictionary with search results and metadata
         """
-        raw_results = self._search.invoke(query)
+        raw_results = self._invoke(query)
         
         return {
             "query": query,
@@ -108,6 +307,27 @@ class TavilySearchTool:
         }
 
 
+@functools.lru_cache(maxsize=8)
+def get_tavily_tool(
+    max_results: int = 3,
+    topic: Literal["general", "news", "finance"] = "general"
+) -> TavilySearchTool:
+    """
+    Get a process-wide TavilySearchTool for the given options.
+    
+    Sharing the tool across Streamlit sessions and reruns also shares its
+    result cache, so any user's repeat query is served without an API call.
+    
+    Args:
+        max_results: Maximum number of search results
+        topic: Search topic - "general", "news", or "finance"
+        
+    Returns:
+        TavilySearchTool instance with semantic caching enabled
+    """
+    return TavilySearchTool(max_results, topic, embedding_manager=EmbeddingManager())
+
+
 class HybridSearchManager:
     """
     Manages hybrid search: combines document search with web search.
@@ -130,7 +350,7 @@ class HybridSearchManager:
             tavily_tool: TavilySearchTool for web search
         """
         self.vector_store = vector_store_manager
-        self.tavily = tavily_tool or TavilySearchTool()
+        self.tavily = tavily_tool or get_tavily_tool()
     
     def search(
         self,
@@ -152,7 +372,8 @@ class HybridSearchManager:
         results = {
             "query": query,
             "document_results": [],
-            "web_results": None
+            "web_results": None,
+            "web_urls": []
         }
         
         # Document search (if vector store is initialized)
@@ -163,7 +384,8 @@ class HybridSearchManager:
         # Web search (if enabled)
         if use_web_search:
             web_results = self.tavily.search(query)
-            results["web_results"] = web_results
+            results["web_results"] = web_results["text"]
+            results["web_urls"] = web_results["urls"]
         
         return results
     
@@ -182,21 +404,7 @@ class HybridSearchManager:
         Returns:
             Formatted context string
         """
-        context_parts = []
-        
-        # Add document context
-        if doc_results:
-            context_parts.append("=== From Your Documents ===")
-            for i, doc in enumerate(doc_results, 1):
-                source = doc.metadata.get("source", "Unknown")
-                context_parts.append(f"[Doc {i}] ({source}):\n{doc.page_content}")
-        
-        # Add web context
-        if web_results:
-            context_parts.append("\n=== From Web Search ===")
-            context_parts.append(web_results)
-        
-        return "\n\n".join(context_parts) if context_parts else "No context available."
+        return format_context(doc_results, web_results)
     
 
 if __name__ == "__main__":
@@ -2,22 +2,26 @@ from ui.components import (
     init_session_state,
     display_chat_history,
     add_message,
+    stream_response,
     clear_chat_history,
     display_sidebar_info,
     display_file_uploader,
     display_processing_status,
     create_web_search_toggle
 )
-from ui.chat_interface import ChatInterface
+from ui.chat_interface import ChatInterface, chat_section, get_chat_interface
 
 __all__ = [
     "init_session_state",
     "display_chat_history",
     "add_message",
+    "stream_response",
     "clear_chat_history",
     "display_sidebar_info",
     "display_file_uploader",
     "display_processing_status",
     "create_web_search_toggle",
-    "ChatInterface"
+    "ChatInterface",
+    "chat_section",
+    "get_chat_interface"
 ]
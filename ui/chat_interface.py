@@ -1,11 +1,28 @@
+import asyncio
+import logging
 import streamlit as st
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, List, Optional
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
 
-from core.document_processor import DocumentProcessor
+from config.settings import settings
+from core.document_processor import get_processor
 from core.vector_store import VectorStoreManager
-from core.chain import RAGChain
-from tools.tavily_search import TavilySearchTool, HybridSearchManager
-from ui.components import add_message, save_uploaded_file
+from core.chain import RAGChain, get_llm, unique_sources
+from core.streaming import abuffer_chunks, iterate_async
+from tools.tavily_search import HybridSearchManager, format_context, get_tavily_tool
+from ui.components import add_message, display_chat_history, file_digest, save_uploaded_file, stream_response
+
+
+logger = logging.getLogger(__name__)
+
+# Prompt for answers grounded in web (and optional document) results
+WEB_PROMPT_TEMPLATE = (
+    "Based on the following search results, answer the question concisely and accurately.\n\n"
+    "Search Results:\n{context}\n\n"
+    "Question: {question}\n\n"
+    "Answer: "
+)
 
 
 class ChatInterface:
@@ -21,47 +38,98 @@ class ChatInterface:
     
     def __init__(self):
         """Initialize chat interface components."""
-        self.doc_processor = DocumentProcessor()
+        self.doc_processor = get_processor(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
         self.vector_store = VectorStoreManager()
         self.rag_chain: Optional[RAGChain] = None
-        self.tavily_search = TavilySearchTool()
+        self.tavily_search = get_tavily_tool()
         self.hybrid_search: Optional[HybridSearchManager] = None
+        
+        # Web-search answer chain, built once (the Groq client is shared)
+        self._web_prompt = ChatPromptTemplate.from_template(WEB_PROMPT_TEMPLATE)
+        self._web_llm = get_llm(settings.LLM_MODEL, settings.LLM_TEMPERATURE)
+        self._web_chain = self._web_prompt | self._web_llm | StrOutputParser()
+        
+        # Sources behind the last answer, published for get_sources
+        self._last_query: Optional[str] = None
+        self._last_sources: List[str] = []
     
     def process_uploaded_files(self, uploaded_files) -> int:
         """
         Process uploaded files and add to vector store.
         
+        Files are keyed by content hash: a file already processed in this
+        session (e.g. on a rerun) is neither re-parsed nor re-indexed.
+        
         Args:
             uploaded_files: List of Streamlit UploadedFile objects
             
         Returns:
             Number of chunks processed
         """
-        all_chunks = []
+        if not uploaded_files:
+            return 0
+        
+        # digest -> (file_path, chunks) for files already indexed
+        file_cache = st.session_state._file_cache
         
+        new_files = []
+        new_digests = []
+        cached_chunks = 0
         for uploaded_file in uploaded_files:
-            # Save file temporarily
-            file_path = save_uploaded_file(uploaded_file)
-            
-            # Process the document
-            chunks = self.doc_processor.process(file_path)
-            
-            # Add source metadata
-            for chunk in chunks:
-                chunk.metadata["source"] = uploaded_file.name
-            
-            all_chunks.extend(chunks)
-            
-            # Track uploaded files
-            if uploaded_file.name not in st.session_state.uploaded_files:
-                st.session_state.uploaded_files.append(uploaded_file.name)
+            digest = file_digest(uploaded_file)
+            if digest in file_cache:
+                cached_chunks += len(file_cache[digest][1])
+                self._track_upload(uploaded_file.name)
+            elif digest not in new_digests:
+                new_files.append(uploaded_file)
+                new_digests.append(digest)
+        
+        if not new_files:
+            return cached_chunks
+        
+        # Save files temporarily (Streamlit objects stay on the script thread)
+        file_paths = [
+            save_uploaded_file(uploaded_file, digest)
+            for uploaded_file, digest in zip(new_files, new_digests)
+        ]
         
-        # Add to vector store
+        # Parse and split files one at a time: pypdf is pure Python and
+        # PyMuPDF holds the GIL (and is not thread-safe), so threads gain nothing
+        chunks_per_file = []
+        progress = st.progress(0.0, text="Parsing documents...")
+        try:
+            for done, (uploaded_file, file_path) in enumerate(zip(new_files, file_paths), 1):
+                # Source metadata is attached while splitting
+                chunks_per_file.append(self.doc_processor.process(file_path, {"source": uploaded_file.name}))
+                progress.progress(done / len(file_paths), text=f"Parsed {done}/{len(file_paths)} file(s)")
+        finally:
+            progress.empty()
+        
+        all_chunks = [chunk for chunks in chunks_per_file for chunk in chunks]
+        
+        # Add to vector store in one batched embedding call
         if all_chunks:
             self.vector_store.add_documents(all_chunks)
             st.session_state.vector_store_initialized = True
+            
+            # Cached answers may be stale now that the corpus changed
+            if self.rag_chain is not None:
+                self.rag_chain.clear_cache()
+        
+        # Only mark files as processed once they are indexed, so a failed
+        # run is retried in full on the next click
+        for uploaded_file, digest, file_path, chunks in zip(new_files, new_digests, file_paths, chunks_per_file):
+            file_cache[digest] = (file_path, chunks)
+            self._track_upload(uploaded_file.name)
         
-        return len(all_chunks)
+        return cached_chunks + len(all_chunks)
+    
+    @staticmethod
+    def _track_upload(name: str) -> None:
+        """Record a processed file name for the sidebar (once per name)."""
+        if name not in st.session_state._uploaded_names:
+            st.session_state._uploaded_names.add(name)
+            st.session_state.uploaded_files.append(name)
     
     def initialize_rag_chain(self):
         """Initialize the RAG chain after documents are loaded."""
@@ -80,6 +148,29 @@ class ChatInterface:
         """
         Get a streaming response for a query.
         
+        Synchronous wrapper around aget_response for callers such as
+        st.write_stream.
+        
+        Args:
+            query: User's question
+            use_web_search: Whether to include web search
+            
+        Yields:
+            Response chunks
+        """
+        yield from iterate_async(self.aget_response(query, use_web_search))
+    
+    async def aget_response(
+        self,
+        query: str,
+        use_web_search: bool = False
+    ) -> AsyncGenerator[str, None]:
+        """
+        Get an async streaming response for a query.
+        
+        Blocking searches run in worker threads and the Groq answer is read
+        with astream, so no thread is held while waiting on the network.
+        
         Args:
             query: User's question
             use_web_search: Whether to include web search
@@ -91,70 +182,55 @@ class ChatInterface:
         if self.rag_chain is None and self.vector_store.is_initialized:
             self.initialize_rag_chain()
         
+        self._last_query = None
+        self._last_sources = []
+        
         # If no documents and no web search, provide helpful message
         if not self.vector_store.is_initialized and not use_web_search:
+            self._last_query = query
             yield "Please upload some documents first, or enable web search to get started!"
             return
         
         # Web search enabled
         if use_web_search:
-            # Get web search results
-            web_results, url = self.tavily_search.search(query)
-            
-            # Get document results if available
-            doc_results = []
+            # Embed the query once for both the web-search semantic cache
+            # and document search, then run the two searches concurrently
+            query_vec = await asyncio.to_thread(self.vector_store.embedding_manager.embed_query, query)
+            searches = [asyncio.to_thread(self.tavily_search.search, query, query_vec)]
             if self.vector_store.is_initialized:
-                doc_results = self.vector_store.search(query)
-                
-
-            # Format context
-            context_parts = []
-            
-            if doc_results:
-                context_parts.append("=== From Your Documents ===")
-                for i, doc in enumerate(doc_results, 1):
-                    source = doc.metadata.get("source", "Unknown")
-                    context_parts.append(f"[Doc {i}] ({source}):\n{doc.page_content}")
-                    print(f"vectore-store_result:{doc.page_content}")
-            
-            if web_results:
-                context_parts.append("\n=== From Web Search ===")
-                context_parts.append(web_results)
-            
-            context = "\n\n".join(context_parts) if context_parts else "No context available."
-            print("llm--context",context)
-            print("doc_results--context",doc_results)
-            # Generate response with context
-            from langchain_groq import ChatGroq
-            from langchain_core.prompts import ChatPromptTemplate
-            from config.settings import settings
-            
-            llm = ChatGroq(
-                model=settings.LLM_MODEL,
-                temperature=settings.LLM_TEMPERATURE,
-                api_key=settings.GROQ_API_KEY
-            )
+                searches.append(self.vector_store.asearch_by_vector(query_vec))
+            web_results, *doc_search = await asyncio.gather(*searches)
+            doc_results = doc_search[0] if doc_search else []
+            self._last_query = query
+            self._last_sources = [f"Web Search Results - {url}" for url in web_results["urls"] if url]
             
-            prompt = ChatPromptTemplate.from_template(
-                "Based on the following search results, answer the question concisely and accurately.\n\n"
-                "Search Results:\n{context}\n\n"
-                "Question: {question}\n\n"
-                "Answer: "
-            )
+            # Format context
+            context = format_context(doc_results, web_results["text"])
+            if logger.isEnabledFor(logging.DEBUG):
+                for doc in doc_results:
+                    logger.debug("vector_store_result: %s", doc.page_content)
+                logger.debug("llm_context: %s", context)
             
-            chain = prompt | llm
-            for chunk in chain.stream({"context": context, "question": query}):
-                yield chunk.content
+            # Generate response with context, coalescing tokens for the UI
+            async for chunk in abuffer_chunks(self._web_chain.astream({"context": context, "question": query})):
+                yield chunk
         
         # Document-only search
         elif self.rag_chain:
-            for chunk in self.rag_chain.query_stream(query):
+            async for chunk in self.rag_chain.aquery_stream(query):
                 yield chunk
+            
+            if self.rag_chain.last_sources:
+                self._last_sources = [", ".join(self.rag_chain.last_sources)]
+            self._last_query = query
     
     def get_sources(self, query: str, use_web_search: bool = False) -> list:
         """
         Get source documents for a query.
         
+        Sources published by get_response for the same query are returned
+        as is; other queries are searched again.
+        
         Args:
             query: User's question
             use_web_search: Whether web search was used
@@ -162,17 +238,83 @@ class ChatInterface:
         Returns:
             List of source document names
         """
+        if query == self._last_query:
+            return list(self._last_sources)
+        
         sources = []
         
         # Get semantic search sources
         if self.vector_store.is_initialized and not use_web_search:
             docs = self.vector_store.search(query)
-            sources.append(", ".join(list(set(doc.metadata.get("source", "Unknown") for doc in docs))))
+            sources.append(", ".join(unique_sources(docs)))
         
         # Get web search sources
         if use_web_search:
-            web_results, url = self.tavily_search.search(query)
-            if web_results:
-                sources.append(f"Web Search Results - {url}")
+            web_results = self.tavily_search.search(query)
+            sources.extend(f"Web Search Results - {url}" for url in web_results["urls"] if url)
         
         return sources
+
+
+def get_chat_interface() -> ChatInterface:
+    """
+    Get this browser session's ChatInterface, creating it on first use.
+    
+    Kept in session state rather than st.cache_resource because it owns the
+    user's vector store; the heavy pieces it uses (embedding model, Groq
+    client, Tavily tool) are already shared process-wide.
+    
+    Returns:
+        ChatInterface instance for the current session
+    """
+    if "chat_interface" not in st.session_state:
+        st.session_state.chat_interface = ChatInterface()
+    return st.session_state.chat_interface
+
+
+@st.fragment
+def chat_section(chat: ChatInterface, use_web_search: bool = False):
+    """
+    Render the chat history, input box and streamed answer.
+    
+    Runs as a fragment: submitting a question reruns only this section,
+    not the sidebar and uploader in the outer script.
+    
+    Args:
+        chat: Session's ChatInterface
+        use_web_search: Whether to include web search
+    """
+    # Display chat history
+    display_chat_history()
+    
+    if prompt := st.chat_input("Ask a question about your documents..."):
+        add_message("user", prompt)
+        
+        # Display user message
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        
+        # Generate and display assistant response
+        with st.chat_message("assistant"):
+            try:
+                # Stream the response
+                response = stream_response(
+                    chat.get_response(prompt, use_web_search=use_web_search)
+                )
+                
+                # Get sources
+                sources = chat.get_sources(prompt, use_web_search=use_web_search)
+                
+                # Show sources if available
+                if sources:
+                    with st.expander("📚 Sources"):
+                        for source in sources:
+                            st.write(f"- {source}")
+                
+                # Add assistant message to history
+                add_message("assistant", response, sources)
+                
+            except Exception as e:
+                error_msg = f"❌ Error generating response: {str(e)}"
+                st.error(error_msg)
+                add_message("assistant", error_msg)
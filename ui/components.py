@@ -1,19 +1,36 @@
 import streamlit as st
+from collections import deque
 from typing import List
+import hashlib
+import shutil
 import tempfile
 import os
 
+from config.settings import settings
+
+
+# Chunk size for streaming uploads to disk
+_COPY_BUFSIZE = 1 << 20
+
 
 def init_session_state():
     """Initialize Streamlit session state variables."""
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        # Bounded so long chats don't grow session memory without limit
+        st.session_state.messages = deque(maxlen=settings.MAX_CHAT_HISTORY)
     
     if "vector_store_initialized" not in st.session_state:
         st.session_state.vector_store_initialized = False
     
     if "uploaded_files" not in st.session_state:
         st.session_state.uploaded_files = []
+    
+    if "_uploaded_names" not in st.session_state:
+        # Set mirror of uploaded_files for O(1) membership checks
+        st.session_state._uploaded_names = set(st.session_state.uploaded_files)
+    
+    if "_file_cache" not in st.session_state:
+        st.session_state._file_cache = {}
 
 
 def display_chat_history():
@@ -33,38 +50,101 @@ def add_message(role: str, content: str, sources: List[str] = None):
     """
     Add a message to chat history.
     
+    Only plain strings are stored (no Document objects), keeping
+    session state small.
+    
     Args:
         role: 'user' or 'assistant'
         content: Message content
         sources: Optional list of source documents
     """
-    message = {"role": role, "content": content}
+    message = {"role": role, "content": str(content)}
     if sources:
-        message["sources"] = sources
+        message["sources"] = [str(source) for source in sources]
     st.session_state.messages.append(message)
 
 
+def stream_response(chunks) -> str:
+    """
+    Render a streamed response and return the full text.
+    
+    In "strong" stream optimization mode the response is shown as plain
+    text while streaming and rendered as markdown once at the end, so
+    markdown is not re-parsed on every update.
+    
+    Args:
+        chunks: Iterable of response text chunks
+        
+    Returns:
+        The complete response text
+    """
+    if settings.STREAM_OPTIMIZATION_MODE != "strong":
+        return st.write_stream(chunks)
+    
+    placeholder = st.empty()
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        placeholder.text("".join(parts))
+    
+    response = "".join(parts)
+    placeholder.markdown(response)
+    return response
+
+
 def clear_chat_history():
     """Clear all messages from chat history."""
-    st.session_state.messages = []
+    st.session_state.messages.clear()
+
+
+def file_digest(uploaded_file) -> str:
+    """
+    Content hash of an uploaded file (hashes the buffer without copying it).
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile object
+        
+    Returns:
+        Hex digest identifying the file contents
+    """
+    return hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+
+
+def get_upload_dir() -> str:
+    """
+    Get this session's temporary upload directory, creating it on first use.
+    
+    The directory is removed when the session state is garbage-collected,
+    or at interpreter exit at the latest.
+    
+    Returns:
+        Path to the directory
+    """
+    if "_tempdir" not in st.session_state:
+        st.session_state._tempdir = tempfile.TemporaryDirectory(prefix="rag_uploads_")
+    return st.session_state._tempdir.name
 
 
-def save_uploaded_file(uploaded_file) -> str:
+def save_uploaded_file(uploaded_file, digest: str = None) -> str:
     """
-    Save an uploaded file to a temporary location.
+    Save an uploaded file to the session's upload directory.
     
     Args:
         uploaded_file: Streamlit UploadedFile object
+        digest: Content hash from file_digest (computed if not given)
         
     Returns:
-        Path to the saved file
+        Path to the saved file (keeps the original extension)
     """
-    # Create temp directory if it doesn't exist
-    temp_dir = tempfile.mkdtemp()
-    file_path = os.path.join(temp_dir, uploaded_file.name)
+    digest = digest or file_digest(uploaded_file)
+    # Prefixing the content hash keeps same-named uploads apart
+    name = f"{digest}_{os.path.basename(uploaded_file.name)}"
+    file_path = os.path.join(get_upload_dir(), name)
     
+    # Copy from the start even if the upload was already read
+    uploaded_file.seek(0)
     with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+        shutil.copyfileobj(uploaded_file, f, length=_COPY_BUFSIZE)
     
     return file_path
 